@@ -5,16 +5,62 @@ Provides tools for basic arithmetic, YoY/MoM calculations, and percentage calcul
 """
 
 from fastmcp import FastMCP
-from typing import Union, Optional
-import json
+from fastmcp.tools import ToolResult
+import operator
+from math import fsum
+import orjson
+import uvicorn
 
 # Initialize FastMCP server with streamable HTTP transport
 mcp = FastMCP(
     "Calculator Server"
 )
 
+# Static error responses, shared rather than rebuilt per request.
+# Responses are only serialized, never mutated.
+_ERR_DIVISION_BY_ZERO = {"error": "Division by zero is not allowed"}
+_ERR_PREV_YEAR_ZERO = {"error": "Previous year value cannot be zero"}
+_ERR_PREV_MONTH_ZERO = {"error": "Previous month value cannot be zero"}
+_ERR_WHOLE_ZERO = {"error": "Whole value cannot be zero"}
+_ERR_EMPTY_VALUES = {"error": "Values list cannot be empty"}
+_ERR_ZERO_SUM = {"error": "Sum of values cannot be zero"}
+
+# Arithmetic operations mapped to their implementation and display symbol
+_OPS = {
+    'add': (operator.add, '+'),
+    'subtract': (operator.sub, '-'),
+    'multiply': (operator.mul, '×'),
+    'divide': (operator.truediv, '÷')
+}
+
+def _calculate(operation: str, a: float, b: float) -> dict:
+    """Arithmetic shared by the `calculate` tool and `batch_calculate`"""
+    # Batch entries are not validated, so the operation may not be a string
+    if not isinstance(operation, str):
+        return {"error": f"Unsupported operation: {operation}"}
+    if not operation.islower():
+        operation = operation.lower()
+    
+    entry = _OPS.get(operation)
+    if entry is None:
+        return {"error": f"Unsupported operation: {operation}"}
+    func, symbol = entry
+    
+    try:
+        result = func(a, b)
+    except ZeroDivisionError:
+        return _ERR_DIVISION_BY_ZERO
+    
+    return {
+        "operation": operation,
+        "a": a,
+        "b": b,
+        "result": result,
+        "formatted": "%s %s %s = %s" % (a, symbol, b, result)
+    }
+
 @mcp.tool()
-def calculate(
+async def calculate(
     operation: str,
     a: float,
     b: float
@@ -30,41 +76,44 @@ def calculate(
     Returns:
         Dictionary with result and operation details
     """
-    operation = operation.lower()
+    return _calculate(operation, a, b)
+
+# The cores take the magnitude of the base with a sign test rather
+# than abs(), which is cheaper for the usual positive base.
+def _growth_core(current: float, previous: float) -> tuple[float, float]:
+    """Return the absolute change and percentage growth over a non-zero base"""
+    change = current - previous
+    return change, (change / (previous if previous > 0.0 else -previous)) * 100
+
+def _percentage_core(part: float, whole: float) -> float:
+    """Return `part` as a percentage of a non-zero `whole`"""
+    return (part / (whole if whole > 0.0 else -whole)) * 100
+
+def _calculate_yoy(
+    current_value: float,
+    previous_year_value: float,
+    as_percentage: bool = True
+) -> dict:
+    """YoY growth shared by the `calculate_yoy` tool and `batch_calculate`"""
+    if previous_year_value == 0:
+        return _ERR_PREV_YEAR_ZERO
     
-    if operation == 'add':
-        result = a + b
-    elif operation == 'subtract':
-        result = a - b
-    elif operation == 'multiply':
-        result = a * b
-    elif operation == 'divide':
-        if b == 0:
-            return {"error": "Division by zero is not allowed"}
-        result = a / b
-    else:
-        return {"error": f"Unsupported operation: {operation}"}
+    yoy_change, yoy_growth = _growth_core(current_value, previous_year_value)
+    
+    if not as_percentage:
+        yoy_growth = yoy_growth / 100
     
     return {
-        "operation": operation,
-        "a": a,
-        "b": b,
-        "result": result,
-        "formatted": f"{a} {get_operator_symbol(operation)} {b} = {result}"
-    }
-
-def get_operator_symbol(operation: str) -> str:
-    """Get the symbol for the operation"""
-    symbols = {
-        'add': '+',
-        'subtract': '-',
-        'multiply': '×',
-        'divide': '÷'
+        "current_value": current_value,
+        "previous_year_value": previous_year_value,
+        "absolute_change": yoy_change,
+        "yoy_growth": yoy_growth,
+        "formatted": ("YoY: %.2f%%" if as_percentage else "YoY: %.2f") % yoy_growth,
+        "direction": "increase" if yoy_change > 0 else "decrease" if yoy_change < 0 else "no change"
     }
-    return symbols.get(operation, operation)
 
 @mcp.tool()
-def calculate_yoy(
+async def calculate_yoy(
     current_value: float,
     previous_year_value: float,
     as_percentage: bool = True
@@ -80,26 +129,33 @@ def calculate_yoy(
     Returns:
         Dictionary with YoY calculation results
     """
-    if previous_year_value == 0:
-        return {"error": "Previous year value cannot be zero"}
+    return _calculate_yoy(current_value, previous_year_value, as_percentage)
+
+def _calculate_mom(
+    current_value: float,
+    previous_month_value: float,
+    as_percentage: bool = True
+) -> dict:
+    """MoM growth shared by the `calculate_mom` tool and `batch_calculate`"""
+    if previous_month_value == 0:
+        return _ERR_PREV_MONTH_ZERO
     
-    yoy_change = current_value - previous_year_value
-    yoy_growth = (yoy_change / abs(previous_year_value)) * 100
+    mom_change, mom_growth = _growth_core(current_value, previous_month_value)
     
     if not as_percentage:
-        yoy_growth = yoy_growth / 100
+        mom_growth = mom_growth / 100
     
     return {
         "current_value": current_value,
-        "previous_year_value": previous_year_value,
-        "absolute_change": yoy_change,
-        "yoy_growth": round(yoy_growth, 2) if as_percentage else yoy_growth,
-        "formatted": f"YoY: {yoy_growth:.2f}{'%' if as_percentage else ''}",
-        "direction": "increase" if yoy_change > 0 else "decrease" if yoy_change < 0 else "no change"
+        "previous_month_value": previous_month_value,
+        "absolute_change": mom_change,
+        "mom_growth": mom_growth,
+        "formatted": ("MoM: %.2f%%" if as_percentage else "MoM: %.2f") % mom_growth,
+        "direction": "increase" if mom_change > 0 else "decrease" if mom_change < 0 else "no change"
     }
 
 @mcp.tool()
-def calculate_mom(
+async def calculate_mom(
     current_value: float,
     previous_month_value: float,
     as_percentage: bool = True
@@ -115,26 +171,28 @@ def calculate_mom(
     Returns:
         Dictionary with MoM calculation results
     """
-    if previous_month_value == 0:
-        return {"error": "Previous month value cannot be zero"}
+    return _calculate_mom(current_value, previous_month_value, as_percentage)
+
+def _calculate_percentage(part: float, whole: float, as_percentage: bool = True) -> dict:
+    """Percentage shared by the `calculate_percentage` tool and `batch_calculate`"""
+    if whole == 0:
+        return _ERR_WHOLE_ZERO
     
-    mom_change = current_value - previous_month_value
-    mom_growth = (mom_change / abs(previous_month_value)) * 100
+    percentage = _percentage_core(part, whole)
     
     if not as_percentage:
-        mom_growth = mom_growth / 100
+        percentage = percentage / 100
     
     return {
-        "current_value": current_value,
-        "previous_month_value": previous_month_value,
-        "absolute_change": mom_change,
-        "mom_growth": round(mom_growth, 2) if as_percentage else mom_growth,
-        "formatted": f"MoM: {mom_growth:.2f}{'%' if as_percentage else ''}",
-        "direction": "increase" if mom_change > 0 else "decrease" if mom_change < 0 else "no change"
+        "part": part,
+        "whole": whole,
+        "percentage": percentage,
+        "formatted": ("%.2f%%" if as_percentage else "%.2f") % percentage,
+        "ratio": part / whole
     }
 
 @mcp.tool()
-def calculate_percentage(
+async def calculate_percentage(
     part: float,
     whole: float,
     as_percentage: bool = True
@@ -150,24 +208,47 @@ def calculate_percentage(
     Returns:
         Dictionary with percentage calculation results
     """
-    if whole == 0:
-        return {"error": "Whole value cannot be zero"}
+    return _calculate_percentage(part, whole, as_percentage)
+
+def _calculate_proportion(values: list[float], normalize: bool = False) -> dict:
+    """Proportions shared by the `calculate_proportion` tool and `batch_calculate`"""
+    if not values:
+        return _ERR_EMPTY_VALUES
     
-    percentage = (part / abs(whole)) * 100
+    # fsum keeps a float total exactly rounded however many values are
+    # summed. Integer-only lists (possible in unvalidated batch entries) keep
+    # sum() so the total stays an exact int. fsum also raises where plain
+    # summation would give inf or nan (an overflowing partial sum, or both
+    # inf and -inf), so fall back to sum() there.
+    if any(isinstance(value, float) for value in values):
+        try:
+            total = fsum(values)
+        except (OverflowError, ValueError):
+            total = sum(values)
+    else:
+        total = sum(values)
+    if total == 0:
+        return _ERR_ZERO_SUM
     
-    if not as_percentage:
-        percentage = percentage / 100
+    # Proportions of the total already sum to 1, so `normalize` needs no
+    # extra pass over the values.
+    proportions = [value / total for value in values]
+    percentages = [prop * 100.0 for prop in proportions]
     
+    # Values are returned unrounded; `formatted` carries the display precision
     return {
-        "part": part,
-        "whole": whole,
-        "percentage": round(percentage, 2) if as_percentage else percentage,
-        "formatted": f"{percentage:.2f}{'%' if as_percentage else ''}",
-        "ratio": part / whole
+        "values": values,
+        "total": total,
+        "proportions": proportions,
+        "percentages": percentages,
+        "formatted": [
+            "Value %d: %s (%.2f%%)" % (i + 1, val, pct)
+            for i, (val, pct) in enumerate(zip(values, percentages))
+        ]
     }
 
 @mcp.tool()
-def calculate_proportion(
+async def calculate_proportion(
     values: list[float],
     normalize: bool = False
 ) -> dict:
@@ -181,33 +262,58 @@ def calculate_proportion(
     Returns:
         Dictionary with proportion calculations
     """
-    if not values:
-        return {"error": "Values list cannot be empty"}
-    
-    total = sum(values)
-    if total == 0:
-        return {"error": "Sum of values cannot be zero"}
-    
-    proportions = [value / total for value in values]
-    
-    if normalize:
-        proportions = [prop / sum(proportions) for prop in proportions]
-    
-    percentages = [prop * 100 for prop in proportions]
-    
-    return {
-        "values": values,
-        "total": total,
-        "proportions": [round(p, 4) for p in proportions],
-        "percentages": [round(p, 2) for p in percentages],
-        "formatted": [
-            f"Value {i+1}: {val} ({pct:.2f}%)"
-            for i, (val, pct) in enumerate(zip(values, percentages))
-        ]
-    }
+    return _calculate_proportion(values, normalize)
+
+def _batch_arithmetic(calc: dict) -> dict:
+    """Unpack an arithmetic batch entry for `_calculate`"""
+    return _calculate(
+        operation=calc["operation"],
+        a=calc["a"],
+        b=calc["b"]
+    )
+
+def _batch_yoy(calc: dict) -> dict:
+    """Unpack a YoY batch entry for `_calculate_yoy`"""
+    return _calculate_yoy(
+        current_value=calc["current_value"],
+        previous_year_value=calc["previous_year_value"],
+        as_percentage=calc.get("as_percentage", True)
+    )
+
+def _batch_mom(calc: dict) -> dict:
+    """Unpack a MoM batch entry for `_calculate_mom`"""
+    return _calculate_mom(
+        current_value=calc["current_value"],
+        previous_month_value=calc["previous_month_value"],
+        as_percentage=calc.get("as_percentage", True)
+    )
+
+def _batch_percentage(calc: dict) -> dict:
+    """Unpack a percentage batch entry for `_calculate_percentage`"""
+    return _calculate_percentage(
+        part=calc["part"],
+        whole=calc["whole"],
+        as_percentage=calc.get("as_percentage", True)
+    )
+
+def _batch_proportion(calc: dict) -> dict:
+    """Unpack a proportion batch entry for `_calculate_proportion`"""
+    return _calculate_proportion(
+        values=calc["values"],
+        normalize=calc.get("normalize", False)
+    )
+
+# Batch calculation types mapped to the handler for a single entry
+_BATCH_DISPATCH = {
+    "arithmetic": _batch_arithmetic,
+    "yoy": _batch_yoy,
+    "mom": _batch_mom,
+    "percentage": _batch_percentage,
+    "proportion": _batch_proportion
+}
 
 @mcp.tool()
-def batch_calculate(
+async def batch_calculate(
     calculations: list[dict]
 ) -> dict:
     """
@@ -220,43 +326,20 @@ def batch_calculate(
         Dictionary with results for all calculations
     """
     results = []
+    successful = 0
     
     for calc in calculations:
         calc_type = calc.get("type")
         
         try:
-            if calc_type == "arithmetic":
-                result = calculate(
-                    operation=calc["operation"],
-                    a=calc["a"],
-                    b=calc["b"]
-                )
-            elif calc_type == "yoy":
-                result = calculate_yoy(
-                    current_value=calc["current_value"],
-                    previous_year_value=calc["previous_year_value"],
-                    as_percentage=calc.get("as_percentage", True)
-                )
-            elif calc_type == "mom":
-                result = calculate_mom(
-                    current_value=calc["current_value"],
-                    previous_month_value=calc["previous_month_value"],
-                    as_percentage=calc.get("as_percentage", True)
-                )
-            elif calc_type == "percentage":
-                result = calculate_percentage(
-                    part=calc["part"],
-                    whole=calc["whole"],
-                    as_percentage=calc.get("as_percentage", True)
-                )
-            elif calc_type == "proportion":
-                result = calculate_proportion(
-                    values=calc["values"],
-                    normalize=calc.get("normalize", False)
-                )
-            else:
+            handler = _BATCH_DISPATCH.get(calc_type)
+            if handler is None:
                 result = {"error": f"Unknown calculation type: {calc_type}"}
+            else:
+                result = handler(calc)
             
+            if "error" not in result:
+                successful += 1
             results.append({
                 "calculation": calc,
                 "result": result
@@ -268,14 +351,30 @@ def batch_calculate(
                 "error": str(e)
             })
     
-    return {
+    payload = {
         "total_calculations": len(calculations),
-        "successful": len([r for r in results if "error" not in r.get("result", {})]),
+        "successful": successful,
         "results": results
     }
+    
+    # Batch responses can be large, so encode the text content with orjson
+    # rather than leaving it to FastMCP's default serializer. The tool stays
+    # annotated `-> dict` so its output schema is still advertised.
+    try:
+        text = orjson.dumps(payload).decode()
+    except orjson.JSONEncodeError:
+        # Values orjson rejects (e.g. integers beyond 64 bits) fall back to
+        # FastMCP's serializer
+        return ToolResult(structured_content=payload)
+    return ToolResult(content=text, structured_content=payload)
 
 if __name__ == "__main__":
-    # Run the MCP server
-    mcp.run(
-    transport="http",
-    port=8000)
+    # Serve the MCP HTTP app through uvicorn.run so its loop setting applies:
+    # "auto" runs on uvloop where it is installed (uvicorn[standard] skips it
+    # on Windows), and requests are parsed with httptools
+    uvicorn.run(
+    mcp.http_app(),
+    host="127.0.0.1",
+    port=8000,
+    loop="auto",
+    http="httptools")